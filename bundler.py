@@ -1,14 +1,26 @@
+import argparse
 import hashlib
 import json
 import os
 import shutil
+import threading
 import zipfile
 import glob
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from common import config, download_file, git, git_output
+from common import config, download_file, git, git_clone, git_update, sha256_file, write_json
+
+parser = argparse.ArgumentParser(description="Bundle the configured game repos into keymasters_keep.apworld")
+parser.add_argument('--output', default='keymasters_keep.apworld', help="apworld to write")
+parser.add_argument('--unmodified', help="apworld to build on top of, downloaded if missing")
+parser.add_argument('--use-submodules', action=argparse.BooleanOptionalAction, default=None,
+                    help="track game repos as submodules (overrides use_submodules in config.yaml)")
+args = parser.parse_args()
 
 unmodified_name = 'keymasters_keep_unmodified.apworld'
-if os.path.exists("keymasters_keep_src.apworld"):
+if args.unmodified:
+    unmodified_name = args.unmodified
+elif os.path.exists("keymasters_keep_src.apworld"):
     # Use when we need to force a build newer than the latest release
     unmodified_name = "keymasters_keep_src.apworld"
 
@@ -24,7 +36,29 @@ if not os.path.exists('keymasters_keep'):
 sources: dict[str, str] = {}
 skipped = {}
 
-use_submodules = config.get('use_submodules', True)
+use_submodules = config.get('use_submodules', True) if args.use_submodules is None else args.use_submodules
+
+hash_cache_name = '_hash_cache.json'
+# path -> [mtime_ns, size, sha256], so unchanged files don't need to be re-read every run
+hash_cache: dict[str, list] = {}
+if os.path.exists(hash_cache_name):
+    with open(hash_cache_name, 'r', encoding='utf-8') as f:
+        hash_cache = json.load(f)
+
+def file_hash(path: str) -> str:
+    st = os.stat(path)
+    cached = hash_cache.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    digest = sha256_file(path)
+    hash_cache[path] = [st.st_mtime_ns, st.st_size, digest]
+    return digest
+
+def remove_file(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
 
 def should_skip_base_name(repo_config, game, folder) -> bool:
     base_name = os.path.basename(game)
@@ -34,12 +68,28 @@ def should_skip_base_name(repo_config, game, folder) -> bool:
         skip_hash = repo_config['skip'].get(base_name)
         if skip_hash is True:
             return True
-        with open(os.path.join(folder, base_name), 'rb') as f:
-            file_hash = str(hashlib.sha256(f.read()).hexdigest())
-        if skip_hash == file_hash:
+        if skip_hash == file_hash(os.path.join(folder, game)):
             return True
     return False
 
+# Submodule adds all edit the top-level .git/config, so only those are serialised
+submodule_lock = threading.Lock()
+
+def sync_repo(repo: str, folder: str) -> None:
+    if not os.path.exists(folder):
+        print(f"Cloning {repo} into {folder}")
+        if use_submodules:
+            with submodule_lock:
+                git(['submodule', 'add', '--depth=1', repo, folder], cwd='.')
+        else:
+            git_clone(repo, folder)
+    elif not use_submodules:
+        # If we're not using submodules to lock to specific commits, grab the latest commit.
+        # We only ever read the files, so there's nothing to merge; just move to the fetched commit.
+        print(f"Updating {folder}")
+        git_update(folder)
+
+repos = []
 for repo in config['game_repos']:
     repo_config = {
         'glob': '*.py',
@@ -51,18 +101,25 @@ for repo in config['game_repos']:
 
     repo = repo.strip().rstrip('/')
     folder = os.path.join('submodules', repo.split('/')[-2].lower() + '_' + repo.split('/')[-1].lower())
-    if not os.path.exists(folder):
-        print(f"Cloning {repo} into {folder}")
-        if use_submodules:
-            git(['submodule', 'add', repo, folder], cwd='.')
-        else:
-            git(['clone', repo, folder], cwd='.')
-    elif not use_submodules:
-        # If we're not using submodules to lock to specific commits, grab the latest commit
-        print(f"Updating {folder}")
-        git_output(['pull'], cwd=folder)
-
-    games = glob.glob(repo_config['glob'], root_dir=folder)
+    repos.append((repo, folder, repo_config))
+
+# Cloning and pulling is bound by network latency, so do every repo at once
+with ThreadPoolExecutor(max_workers=min(16, len(repos))) as executor:
+    futures = [executor.submit(sync_repo, repo, folder) for repo, folder, _ in repos]
+    for future in as_completed(futures):
+        future.result()
+
+def find_games(folder: str, pattern: str) -> list[str]:
+    if pattern == '*.py':
+        # The common case doesn't need glob's pattern matching
+        with os.scandir(folder) as entries:
+            return [entry.name for entry in entries if entry.name.endswith('.py') and not entry.name.startswith('.') and entry.is_file()]
+    return glob.glob(pattern, root_dir=folder)
+
+# Games that end up in keymasters_keep/games this run, in the order they were found
+bundled: dict[str, None] = {}
+for repo, folder, repo_config in repos:
+    games = find_games(folder, repo_config['glob'])
     if not games:
         raise Exception(f"No games found in {folder} matching {repo_config['glob']}")
     for game in games:
@@ -72,40 +129,62 @@ for repo in config['game_repos']:
         if should_skip_base_name(repo_config, game, folder):
             if repo != 'https://github.com/SerpentAI/KeymastersKeepGameArchive':
                 print(f"Skipping {base_name} as per configuration")
-                with open(os.path.join(folder, game), 'rb') as f:
-                    file_hash = str(hashlib.sha256(f.read()).hexdigest())
-                skipped[base_name] = file_hash
-            if os.path.exists(dest):
-                os.unlink(dest)
+                skipped[base_name] = file_hash(os.path.join(folder, game))
+            remove_file(dest)
+            bundled.pop(base_name, None)
             continue
-        if os.path.exists(dest):
-            old_source = sources.get(base_name, None)
-            if old_source and old_source != "https://github.com/SerpentAI/KeymastersKeepGameArchive":
-                print(f"WARNING: Game {base_name} already exists from {old_source}, cannot overwrite with {repo}")
-            # print(f"Updating {base_name} from {folder} (was {old_source})")
-            os.remove(dest)
-        sources[base_name] = repo
-
         # We modify the game file to include the source repo at the top
         with open(os.path.join(folder, game), 'r', encoding='utf-8') as f:
-            content = f.read()
-        content = f"# Source: {repo}\n" + content
-        with open(dest, 'w', encoding='utf-8') as f:
-            f.write(content)
+            content = f"# Source: {repo}\n" + f.read()
+        data = content.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
 
-    with open('sources.json', 'w', encoding='utf-8') as f:
-        json.dump(sources, f, indent=4, ensure_ascii=False)
+        old_source = sources.get(base_name, None)
+        if old_source and old_source != "https://github.com/SerpentAI/KeymastersKeepGameArchive":
+            print(f"WARNING: Game {base_name} already exists from {old_source}, cannot overwrite with {repo}")
+        sources[base_name] = repo
+        bundled[base_name] = None
+        try:
+            if file_hash(dest) == digest:
+                # Already up to date from a previous run
+                continue
+        except FileNotFoundError:
+            pass
+
+        # print(f"Updating {base_name} from {folder} (was {old_source})")
+        with open(dest, 'wb') as f:
+            f.write(data)
+        st = os.stat(dest)
+        hash_cache[dest] = [st.st_mtime_ns, st.st_size, digest]
+
+    write_json('sources.json', sources)
+
+with open(hash_cache_name, 'w', encoding='utf-8') as f:
+    json.dump(hash_cache, f)
 
 added_games = []
-shutil.copy(unmodified_name, 'keymasters_keep.apworld')
-with zipfile.ZipFile('keymasters_keep.apworld', 'a') as zipf:
-    for game in glob.glob('*.py', root_dir='keymasters_keep/games'):
+# Building the archive is bound by zlib, and the fastest level costs only a few percent in size
+compresslevel = 1
+with zipfile.ZipFile(unmodified_name, 'r') as zin, zipfile.ZipFile(args.output, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zipf:
+    existing = set()
+    for info in zin.infolist():
+        if info.is_dir():
+            zipf.writestr(info, b'')
+        else:
+            # ZipFile.open() takes the level from the ZipInfo rather than the archive
+            info._compresslevel = compresslevel
+            with zin.open(info) as src, zipf.open(info, 'w') as dst:
+                shutil.copyfileobj(src, dst, length=1 << 16)
+        existing.add(info.filename)
+
+    for game in bundled:
         path = f'keymasters_keep/games/{game}'
-        if path in zipf.namelist():
+        if path in existing:
             print(f"Game {path} already exists in the archive, skipping.")
             continue
 
         zipf.write(path, path)
+        existing.add(path)
         added_games.append(game)
 
 print(f"Bundling complete. {len(added_games)} games are now bundled.")
@@ -1,17 +1,69 @@
+import email.utils
+import hashlib
+import json
+import os
+import shutil
 import subprocess
 import requests
 import yaml
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+
+# Shared so that repeated downloads reuse the same connection
+session = requests.Session()
+
 
 def download_file(url: str, dest: str) -> None:
-    """Download a file from a URL to a destination path."""
+    """Download a file from a URL to a destination path, unless the existing copy is still current."""
     print(f"Downloading {url} to {dest}")
-    response = requests.get(url)
-    if response.status_code == 200:
-        with open(dest, 'wb') as file:
-            file.write(response.content)
-    else:
-        raise Exception(f"Failed to download {url}: {response.status_code}")
+    headers = {}
+    if os.path.exists(dest):
+        headers['If-Modified-Since'] = email.utils.formatdate(os.stat(dest).st_mtime, usegmt=True)
+    with session.get(url, stream=True, timeout=30, headers=headers) as response:
+        if response.status_code == 304:
+            print(f"{dest} is already up to date")
+            return
+        response.raise_for_status()
+        response.raw.decode_content = True
+        # Download beside the destination and only move it into place once complete,
+        # so an interrupted transfer never leaves a truncated file that looks current
+        part = dest + '.part'
+        try:
+            with open(part, 'wb') as file:
+                shutil.copyfileobj(response.raw, file, length=1 << 16)
+            os.replace(part, dest)
+        finally:
+            if os.path.exists(part):
+                os.unlink(part)
+        if last_modified := response.headers.get('Last-Modified'):
+            # Match the server's timestamp so the next If-Modified-Since is compared like for like
+            mtime = email.utils.parsedate_to_datetime(last_modified).timestamp()
+            os.utime(dest, (mtime, mtime))
+
+
+def write_json(path: str, obj) -> None:
+    """Write an object to a file as indented JSON."""
+    if orjson is None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2, ensure_ascii=False)
+        return
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+
+def sha256_file(path: str) -> str:
+    """Return the hex SHA-256 digest of a file, streamed from disk."""
+    with open(path, 'rb', buffering=0) as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
 
 
 def git(args: list[str], cwd: str) -> int:
@@ -34,5 +86,32 @@ def git_output(args: list[str], cwd: str) -> str:
         raise Exception(f"Git command failed: {e}")
 
 
+def git_clone(repo: str, folder: str) -> None:
+    """Shallow clone a repository, without spawning git when pygit2 is available."""
+    if pygit2 is None:
+        git(['clone', '--depth=1', '--single-branch', repo, folder], cwd='.')
+        return
+    pygit2.clone_repository(repo, folder, depth=1)
+
+
+def git_update(folder: str) -> None:
+    """Hard reset a clone to the latest commit of the remote's default branch."""
+    if pygit2 is None:
+        # Fetch HEAD by name, as a detached checkout would otherwise get whichever branch sorts first in FETCH_HEAD
+        git_output(['fetch', '--depth=1', 'origin', 'HEAD'], cwd=folder)
+        git_output(['reset', '--hard', 'FETCH_HEAD'], cwd=folder)
+        return
+    repository = pygit2.Repository(folder)
+    remote = repository.remotes['origin']
+    remote.fetch(depth=1)
+    # Submodule checkouts are on a detached HEAD, so go by the remote's HEAD rather than a local tracking branch
+    remote_head = repository.references.get('refs/remotes/origin/HEAD')
+    if remote_head is not None:
+        target = remote_head.resolve().target
+    else:
+        target = next(head.oid for head in remote.list_heads() if head.name == 'HEAD')
+    repository.reset(target, pygit2.GIT_RESET_HARD)
+
+
 with open('config.yaml', 'r') as file:
     config = yaml.safe_load(file)
@@ -1,36 +1,25 @@
 import csv
+import re
 import requests
 import yaml
 
 url = "https://docs.google.com/spreadsheets/d/1qhmvUi4UEN5M2zH3SVUOgDkW6jZL2icZ2VcIf123z9Q/export?format=csv"
 
+# Captures the repo URL, dropping any /tree/... or /blob/... suffix and trailing slashes
+repo_pattern = re.compile(r"^(https://github\.com/.*?)(?:/(?:tree|blob)/.*)?/*$")
+
 sheet = requests.get(url, allow_redirects=True)
 data = csv.reader(sheet.text.splitlines())
 
 
-sheet_repos = set()
-
-for row in data:
-    if (repo := row[1]).startswith("https://github.com/"):
-        if '/tree/' in repo:
-            repo = repo.split('/tree/')[0]
-        if '/blob/' in repo:
-            repo = repo.split('/blob/')[0]
-        sheet_repos.add(repo.strip().rstrip('/'))
+sheet_repos = {match.group(1) for row in data if (match := repo_pattern.match(row[1].strip()))}
 
 pass
 
 with open('config.yaml', 'r') as file:
     config = yaml.safe_load(file)
 
-config_repos = set()
-
-for repo in config['game_repos']:
-    if isinstance(repo, dict):
-        repo = repo.pop('url')
-
-    repo = repo.strip().rstrip('/')
-    config_repos.add(repo)
+config_repos = {(repo['url'] if isinstance(repo, dict) else repo).strip().rstrip('/') for repo in config['game_repos']}
 
 pass
 
@@ -1,15 +1,30 @@
 import collections
+import functools
+import multiprocessing
 import os
+import re
 import sys
 import random
 import json
 import textwrap
 import typing
-from typing import Any, Callable, Dict, List, Sequence, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
 
 import yaml
 from traceback_with_variables import activate_by_import
 
+try:
+    # libyaml bindings, several times faster than the pure Python implementation
+    from yaml import CSafeDumper as YamlDumper, CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeDumper as YamlDumper, SafeLoader as YamlLoader
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 sys.path.append("archipelago")
 sys.path.append("../archipelago")
@@ -22,30 +37,50 @@ def converter(obj):
     if isinstance(obj, (set, frozenset)):
         return sorted(obj)
 
+def dump_json(obj) -> bytes:
+    # objectives.json is a generated artifact, so it's written compactly rather than pretty-printed
+    if orjson is not None:
+        return orjson.dumps(obj, default=converter, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=converter).encode("utf-8")
+
 def main():
     import worlds
     source = worlds.WorldSource(os.path.abspath("keymasters_keep.apworld"), True, False)
     source.load()
 
-    games = []
-    gather_data(games)
-
-    with open("objectives.json", "w", encoding="utf-8") as f:
-        json.dump(games, f, indent=4, ensure_ascii=False, default=converter)
+    sources = load_sources()
+    by_platform = {}
+    os.makedirs(GAMES_DIR, exist_ok=True)
+    # Each game is written out as soon as it's processed, so only one is held in memory at a time
+    with open("objectives.json", "wb") as f:
+        f.write(b"[")
+        for index, game in enumerate(gather_data()):
+            if index != 0:
+                f.write(b",")
+            f.write(dump_json(game))
+            write_game_doc(game, sources)
+            for platform in game['platforms']:
+                by_platform.setdefault(platform, []).append({'name': game['name'], 'file': game['file']})
+        f.write(b"]")
 
-    write_docs(games)
+    write_platform_docs(by_platform)
     pass
 
-def gather_data(games):
-    import re
+GAMES_DIR = "docs/games"
+PLATS_DIR = "docs/platforms"
+
+# Shared with worker processes, which inherit it when forked
+_options = None
+
+def gather_data():
     from worlds.keymasters_keep.game import AutoGameRegister
     from worlds.keymasters_keep.world import KeymastersKeepOptions
+    global _options
 
-    seed = random.Random()
     opt_dict = {option_key: option.from_any(option.default)
                     for option_key, option in KeymastersKeepOptions.type_hints.items()}
     with open("yaml_settings.yaml", "r", encoding="utf-8") as f:
-        yaml_opts = yaml.safe_load(f)
+        yaml_opts = yaml.load(f, Loader=YamlLoader)
         for key, value in yaml_opts.items():
             if key in opt_dict:
                 if opt_dict[key].value == value:
@@ -54,131 +89,185 @@ def gather_data(games):
             else:
                 print(f"Warning: Unknown option '{key}' in yaml_settings.yaml, ignoring.")
 
-    opts = KeymastersKeepOptions(**opt_dict)
+    _options = KeymastersKeepOptions(**opt_dict)
 
-    for name, cls in AutoGameRegister.games.items():
-        game = cls(random=seed, include_time_consuming_objectives=True, include_difficult_objectives=True, archipelago_options=opts)
-        # print(f"Loaded game: {game.name} with options: {game.options_cls}")
-        if not game.should_autoregister:
-            print(f"Game {game.name} does not have auto-registration enabled, skipping.")
-            continue
-        gamedat = expand_objectives(game)
-        gamedat['name'] = name
-        gamedat['file'] = game.__module__.split(".")[-1].lower()
-        yaml_keys = game.options_cls.__annotations__.keys()
-        if yaml_keys:
-            gopts = opts.as_dict(*yaml_keys)
-            gamedat['yaml'] = yaml.dump(gopts)
-
-        gamedat['doc'] = sys.modules[game.__module__].__doc__
-        if game.__doc__ is not None:
-            # Remove leading spaces in docstring to disable code block formatting by Markdown
-            gamedat['gamedoc'] = re.sub(r"^ {4}", "", game.__doc__, flags=re.MULTILINE)
-        gamedat['platforms'] = [game.platform.value]
-        if game.platforms_other:
-            gamedat['platforms'].extend([p.value for p in game.platforms_other])
-        games.append(gamedat)
-
-def write_docs(games):
+    names = list(AutoGameRegister.games.keys())
+    if "fork" in multiprocessing.get_all_start_methods():
+        # Forked workers inherit the already loaded apworld instead of importing it again
+        workers = os.cpu_count() or 1
+        # Hand games out in batches to cut down on round trips, while leaving enough batches to balance the load
+        chunksize = max(1, len(names) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+            for gamedat in executor.map(_process_game, names, chunksize=chunksize):
+                if gamedat is not None:
+                    yield gamedat
+    else:
+        for name in names:
+            gamedat = _process_game(name)
+            if gamedat is not None:
+                yield gamedat
+
+def _process_game(name):
+    from worlds.keymasters_keep.game import AutoGameRegister
+
+    opts = _options
+    cls = AutoGameRegister.games[name]
+    game = cls(random=random.Random(), include_time_consuming_objectives=True, include_difficult_objectives=True, archipelago_options=opts)
+    # print(f"Loaded game: {game.name} with options: {game.options_cls}")
+    if not game.should_autoregister:
+        print(f"Game {game.name} does not have auto-registration enabled, skipping.")
+        return None
+    gamedat = expand_objectives(game)
+    module_name = game.__module__
+    gamedat['name'] = name
+    gamedat['file'] = module_name.rpartition(".")[2].lower()
+    yaml_keys = game.options_cls.__annotations__.keys()
+    if yaml_keys:
+        gamedat['yaml'] = _options_yaml(tuple(sorted(yaml_keys)))
+
+    gamedat['doc'] = sys.modules[module_name].__doc__
+    if game.__doc__ is not None:
+        # Remove leading spaces in docstring to disable code block formatting by Markdown
+        gamedat['gamedoc'] = re.sub(r"^ {4}", "", game.__doc__, flags=re.MULTILINE)
+    gamedat['platforms'] = [game.platform.value]
+    if game.platforms_other:
+        gamedat['platforms'].extend([p.value for p in game.platforms_other])
+    return gamedat
+
+# Strings that can be written unquoted without YAML reading them back as something else
+_plain_yaml_str = re.compile(r"[A-Za-z_][A-Za-z0-9_ ./()-]*(?<! )")
+_yaml_reserved = {"true", "false", "yes", "no", "on", "off", "y", "n", "null"}
+
+def _yaml_scalar(value) -> Optional[str]:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, str) and _plain_yaml_str.fullmatch(value) and value.lower() not in _yaml_reserved:
+        return value
+    return None
+
+def dump_options_yaml(options: Dict[str, Any]) -> str:
+    """Equivalent to yaml.dump for a flat options dict, without going through the emitter for simple values."""
+    lines = []
+    for key in sorted(options):
+        value = options[key]
+        scalar = _yaml_scalar(value)
+        line = f"{key}: {scalar}\n"
+        # yaml.dump folds plain scalars that run past its 80 column width, so only short lines can skip it
+        if scalar is not None and _yaml_scalar(key) == key and len(line) <= 80:
+            lines.append(line)
+        else:
+            # Collections, long or awkward strings still go through PyYAML
+            lines.append(yaml.dump({key: value}, Dumper=YamlDumper, default_flow_style=False))
+    return "".join(lines)
+
+@functools.lru_cache(maxsize=None)
+def _options_yaml(keys: typing.Tuple[str, ...]) -> str:
+    # Games sharing an options class would otherwise re-derive the same mapping
+    return dump_options_yaml(_options.as_dict(*keys))
+
+@functools.cache
+def load_sources():
     with open('sources.json', 'r', encoding='utf-8') as f:
         sources = json.load(f)
-        sources = {os.path.splitext(k.lower())[0]: v for k, v in sources.items()}
-    by_platform = {}
-    os.makedirs("docs/games", exist_ok=True)
-    for game in games:
-        with open(os.path.join("docs", "games", f"{game['file']}.md"), "w", encoding="utf-8") as f:
-            f.write(f"# {game['name']}\n\n")
-            source = sources.get(game['file'], None)
-            if source:
-                f.write(f"Download: [{source}]({source})\n\n")
-            # While interchangeable, the game docstring takes precedence over the file docstring, as the game docstring is more likely to describe the game (Archipelago standard) while the file docstring is more likely to describe the implementation
-            if 'gamedoc' in game.keys():
-                f.write(f"---\n\n{game['gamedoc']}\n\n")
-            if game['doc'] is not None:
-                f.write(f"---\n\n{game['doc']}\n\n")
-            yaml_content = game.get('yaml', None)
-            if yaml_content:
-                f.write('??? "Default Yaml Options"\n\n')
-                f.write("    Generated with the following options:\n")
-                f.write("    ```yaml\n")
-                f.write(textwrap.indent(yaml_content, "    "))
-                f.write("    ```\n\n")
-            f.write("## Objectives\n\n")
-            for objective in game['objectives']:
-                label = objective['label']
-                is_difficult = objective['is_difficult']
-                is_time_consuming = objective['is_time_consuming']
-                for key, value in objective['data'].items():
-                    label = label.replace(key, f"{key}[^{value}]")
-                f.write(f"- {label}")
-                if is_difficult:
-                    f.write("⚠️")
-                if is_time_consuming:
-                    f.write("⏳")
-                f.write("\n")
-
-            f.write("\n")
-            for key, dataset in game['datasets'].items():
-                f.write(f'[^{key}]: ')
-                for index, item in enumerate(dataset):
-                    if index != 0:
-                        f.write(', ')
-                    f.write(str(item['value']))
-                    if item['count'] > 1:  # Show count as subscript
-                        f.write(f"<sub>×{item['count']}</sub>")
-                f.write('\n')
-
-        for platform in game['platforms']:
-            by_platform.setdefault(platform, []).append(game)
-
-    os.makedirs("docs/platforms", exist_ok=True)
+    # Keys are game file names, so only the final extension needs stripping
+    return {k.lower().rsplit('.', 1)[0]: v for k, v in sources.items()}
+
+def write_game_doc(game, sources):
+    # Pages are assembled in memory and written with a single call
+    parts = [f"# {game['name']}\n\n"]
+    source = sources.get(game['file'], None)
+    if source:
+        parts.append(f"Download: [{source}]({source})\n\n")
+    # While interchangeable, the game docstring takes precedence over the file docstring, as the game docstring is more likely to describe the game (Archipelago standard) while the file docstring is more likely to describe the implementation
+    if 'gamedoc' in game.keys():
+        parts.append(f"---\n\n{game['gamedoc']}\n\n")
+    if game['doc'] is not None:
+        parts.append(f"---\n\n{game['doc']}\n\n")
+    yaml_content = game.get('yaml', None)
+    if yaml_content:
+        parts.append('??? "Default Yaml Options"\n\n')
+        parts.append("    Generated with the following options:\n")
+        parts.append("    ```yaml\n")
+        parts.append(textwrap.indent(yaml_content, "    "))
+        parts.append("    ```\n\n")
+    parts.append("## Objectives\n\n")
+    for objective in game['objectives']:
+        label = objective['label']
+        is_difficult = objective['is_difficult']
+        is_time_consuming = objective['is_time_consuming']
+        data = objective['data']
+        if data:
+            label = _footnote_pattern(frozenset(data)).sub(lambda m: f"{m.group(0)}[^{data[m.group(0)]}]", label)
+        parts.append(f"- {label}")
+        if is_difficult:
+            parts.append("⚠️")
+        if is_time_consuming:
+            parts.append("⏳")
+        parts.append("\n")
+
+    parts.append("\n")
+    for key, dataset in game['datasets'].items():
+        values = ', '.join(
+            str(item['value']) + f"<sub>×{item['count']}</sub>" if item['count'] > 1 else str(item['value'])  # Show count as subscript
+            for item in dataset
+        )
+        parts.append(f'[^{key}]: {values}\n')
+
+    with open(f"{GAMES_DIR}/{game['file']}.md", "w", encoding="utf-8") as f:
+        f.write("".join(parts))
+
+def write_platform_docs(by_platform):
+    os.makedirs(PLATS_DIR, exist_ok=True)
     plat_names = get_comments_from_enums()
     for platform, games in by_platform.items():
         name = plat_names.get(platform, platform)
         header = f"# {name}\n\n"
-        if os.path.exists(os.path.join("docs", "platforms", f"{platform}.md")):
-            with open(os.path.join("docs", "platforms", f"{platform}.md"), "r", encoding="utf-8") as f:
-                text = f.read()
-                text = text.split("## Games")[0]  # Keep the header only
-        with open(os.path.join("docs", "platforms", f"{platform}.md"), "w", encoding="utf-8") as f:
-            f.write(header)
-            f.write("## Games\n\n")
-            for game in games:
-                f.write(f"- [{game['name']}](../games/{game['file']}.md)\n")
+        parts = [header, "## Games\n\n"]
+        for game in games:
+            parts.append(f"- [{game['name']}](../games/{game['file']}.md)\n")
+        with open(f"{PLATS_DIR}/{platform}.md", "w", encoding="utf-8") as f:
+            f.write("".join(parts))
 
+@functools.lru_cache(maxsize=None)
+def _footnote_pattern(keys: typing.FrozenSet[str]) -> "re.Pattern[str]":
+    # Longest keys first, so a key that is a prefix of another can't match inside it
+    return re.compile("|".join(re.escape(key) for key in sorted(keys, key=len, reverse=True)))
+
+# Enum members with a trailing comment, e.g. `A2600 = "A2600"  # Atari 2600`
+_enum_comment = re.compile(r'^\s*\w+\s*=\s*["\']([^"\']+)["\'].*?#\s*(.*?)\s*$', re.MULTILINE)
+
+@functools.cache
 def get_comments_from_enums() -> Dict[str, str]:
-    plats = {}
-    import tokenize
-    with open('keymasters_keep/enums.py') as f:
-        tokens = tokenize.generate_tokens(f.readline)
-        key = None
-        comment = None
-        for tok in tokens:
-            if tok.type == tokenize.STRING:
-                key = tok.string.strip('"\'')
-            elif tok.type == tokenize.COMMENT:
-                comment = tok.string
-                plats[key] = comment.lstrip('# ').strip()
-
-    return plats
+    with open('keymasters_keep/enums.py', encoding='utf-8') as f:
+        text = f.read()
+    return {m.group(1): m.group(2) for m in _enum_comment.finditer(text)}
 
 def expand_objectives(game: "Game"):
     objectives = []
     datasets = {}
+    seen = {}
     for o in game.game_objective_templates():
-        objectives.append(expand_objective(o, datasets))
+        objectives.append(expand_objective(o, datasets, seen))
         pass
 
     data = {"game": game.name, "objectives": objectives, "datasets": datasets}
     return data
 
-def expand_objective(o: "GameObjectiveTemplate", datasets: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+def expand_objective(o: "GameObjectiveTemplate", datasets: Dict[str, List[Dict[str, Any]]], seen: Dict[int, str]) -> Dict[str, Any]:
     game_objective = o.label
 
     key: str
     collection: tuple[Callable[[], Union[List[Any], range]], Union[int, Sequence[int], Callable[[], int]]]
     data = {}
     for key, collection in o.data.items():
+        # Templates commonly share a data source, so only evaluate each one once per game
+        if id(collection[0]) in seen:
+            data[key] = seen[id(collection[0])]
+            continue
         # k: int
 
         # if isinstance(collection[1], Sequence):
@@ -188,9 +277,28 @@ def expand_objective(o: "GameObjectiveTemplate", datasets: Dict[str, List[Dict[s
         # else:
         #     k = collection[1]
 
-        if isinstance(collection[0], range):
-            evaluated_collection = list(collection[0])
-        elif callable(collection[0]):
+        funcname = getattr(collection[0], '__name__', None)
+        if funcname is not None and funcname != "<lambda>":
+            data[key] = funcname
+            seen[id(collection[0])] = funcname
+            if funcname in datasets:
+                # Already expanded from another function with the same name, no need to evaluate it again
+                continue
+        else:
+            if funcname is None:
+                funcname = o.__class__.__name__ + "_" + key
+            else:
+                funcname = f"lambda_{collection[0].__code__.co_firstlineno}"
+            # Made-up names can be shared by unrelated sources (every range or list under the same key), so number repeats
+            base_name, suffix = funcname, 2
+            while funcname in datasets:
+                funcname = f"{base_name}_{suffix}"
+                suffix += 1
+            data[key] = funcname
+            seen[id(collection[0])] = funcname
+
+        # Ranges are used as-is; counting and sorting them doesn't need a list
+        if callable(collection[0]):
             evaluated_collection = collection[0]()
         else:
             evaluated_collection = collection[0]
@@ -198,13 +306,6 @@ def expand_objective(o: "GameObjectiveTemplate", datasets: Dict[str, List[Dict[s
         if not evaluated_collection:
             raise Exception(f"Collection for key '{key}' is empty or invalid.")
         # example = ", ".join(str(value) for value in random.sample(*(evaluated_collection, k)))
-        if hasattr(collection[0], '__name__'):
-            funcname = collection[0].__name__
-        else:
-            funcname = o.__class__.__name__ + "_" + key
-        if funcname == "<lambda>":
-            funcname = f"lambda_{collection[0].__code__.co_firstlineno}"
-        data[key] = funcname
         # Some implementations duplicate dataset values to artificially create weighted selection without using the `weight` attribute. This has the potential to fill footnotes with way too much text. To avoid this, unique values are identified and counted, the counts being displayed in footnotes if necessary.
         func_value_counts = collections.Counter(evaluated_collection)
         func_values = sorted(func_value_counts.keys())
@@ -37,40 +37,226 @@ This tool is essential for validating game implementations before deployment
 and ensures compatibility with the Keymaster's Keep ecosystem.
 """
 
+import functools
+import heapq
+import io
+import math
 import os
+import pickle
 import sys
+import traceback
 import importlib.util
-import inspect
 import types
 import re
 import random
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from itertools import accumulate, islice
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional, Tuple
+from dataclasses import astuple, dataclass, fields, is_dataclass
+
+# Default values for universal option classes, keyed by what the class name suggests
+_UNIVERSAL_DEFAULTS = {
+    'selection': {"default_selection"},
+    'actions': {"default_action"},
+    'range': 50,
+    'toggle': True,
+    'default': {"default"},
+}
+
+class UniversalOption:
+    """Base for dynamically created option classes; subclasses pick their default through _default_key."""
+    _default_key = 'default'
+
+    def __init__(self, value=None):
+        if value is None:
+            value = _UNIVERSAL_DEFAULTS[self._default_key]
+            if isinstance(value, set):
+                value = set(value)  # Each option gets its own set
+        self.value = value
 
 def create_option_class(class_name):
     """Dynamic class creation for any possible option type."""
-    class UniversalOption:
-        def __init__(self, value=None):
-            if value is None:
-                # Smart default based on class name
-                class_name_lower = class_name.lower()
-                if 'selection' in class_name_lower:
-                    self.value = {"default_selection"}
-                elif 'actions' in class_name_lower:
-                    self.value = {"default_action"}
-                elif 'range' in class_name_lower:
-                    self.value = 50
-                elif 'toggle' in class_name_lower:
-                    self.value = True
-                else:
-                    self.value = {"default"}
-            else:
-                self.value = value
+    # Smart default based on class name
+    class_name_lower = class_name.lower()
+    for default_key in ('selection', 'actions', 'range', 'toggle'):
+        if default_key in class_name_lower:
+            break
+    else:
+        default_key = 'default'
+
+    return type(class_name, (UniversalOption,), {'_default_key': default_key})
+
+# Platform codes for the mocked KeymastersKeepGamePlatforms enum, built once at import
+_PLATFORMS = {
+    "_32X": "32X",  # Sega 32X
+    "_3DO": "3D0",  # 3DO Multiplayer
+    "_3DS": "3DS",  # Nintendo 3DS
+    "A2": "A2",  # Apple II
+    "A26": "A26",  # Atari 2600
+    "A2GS": "A2GS",  # Apple IIGS
+    "A52": "A52",  # Atari 5200
+    "A78": "A78",  # Atari 7800
+    "A8": "A8",  # Atari 8-bit: 400, 800, XL, XE
+    "ADV": "ADV",  # Entex AdventureVision
+    "AMI": "AMI",  # Commodore Amiga
+    "AND": "AND",  # Android OS
+    "ARC": "ARC",  # Arcade
+    "ARCH": "ARCH",  # Acorn Archimedes
+    "AST": "AST",  # Atari ST
+    "BA": "BA",  # Bally Astrocade
+    "BB": "BB",  # BlackBerry
+    "BBCM": "BBCM",  # BBC Micro
+    "BOARD": "BOARD",  # Board Game (Physical)
+    "BREW": "BREW",  # Qualcomm BREW
+    "C64": "C64",  # Commodore 64
+    "C128": "C128",  # Commodore 128
+    "CARD": "CARD",  # Card Game (Physical)
+    "CD32": "CD32",  # Amiga CD32
+    "CDI": "CDI",  # Philips CD-i
+    "CDTV": "CDTV",  # Commodore CDTV
+    "CHF": "CHF",  # Fairchild Channel F
+    "CP4": "CP4",  # Commodore 116, 16, Plus/4
+    "CPC": "CPC",  # Amstrad CPC 464, CPC664, CPC6128
+    "CV": "CV",  # ColecoVision
+    "DC": "DC",  # Sega Dreamcast
+    "DOS": "DOS",  # MS-DOS
+    "ELEC": "ELEC",  # Acorn Electron
+    "EXEN": "EXEN",  # In-Fusion ExEn
+    "FAL": "FAL",  # Atari Falcon030
+    "FC": "FC",  # Nintendo Famicom
+    "FDS": "FDS",  # Nintendo Famicom Disk System
+    "FIRE": "FIRE",  # Amazon Fire OS
+    "FM7": "FM7",  # Fujitsu FM-7
+    "FMT": "FMT",  # Fujitsu FM Towns
+    "GB": "GB",  # Nintendo Game Boy
+    "GBA": "GBA",  # Nintendo Game Boy Advance
+    "GBC": "GBC",  # Nintendo Game Boy Color
+    "GC": "GC",  # Nintendo GameCube
+    "GCOM": "GCOM",  # Tiger Game.com
+    "GEN": "GEN",  # Sega Genesis
+    "GG": "GG",  # Sega Game Gear
+    "GIZ": "GIZ",  # Tiger Gizmondo
+    "GW": "GW",  # Nintendo Game & Watch
+    "GX4": "GX4",  # Amstrad GX4000
+    "IMOD": "IMOD",  # NTT DoCoMo i-mode
+    "INTV": "INTV",  # Intellivision, Intellivision II
+    "IOS": "IOS",  # Apple iOS: iPad, iPod, iPhone
+    "J2ME": "J2ME",  # Sun Java 2 Micro Edition
+    "JAG": "JAG",  # Atari Jaguar
+    "JCD": "JCD",  # Atari Jaguar CD
+    "LASR": "LASR",  # Pioneer LaserActive
+    "LYNX": "LYNX",  # Atari Lynx
+    "MART": "MART",  # Fujitsu FM Towns Marty
+    "MCD": "MCD",  # Sega Mega CD
+    "META": "META",  # Metagame
+    "MOD": "MOD",  # Modded Game
+    "MSX": "MSX",  # MSX
+    "MSX2": "MSX2",  # MSX2, MSX2+, MSX TurboR
+    "N64": "N64",  # Nintendo 64
+    "NDS": "NDS",  # Nintendo DS
+    "NES": "NES",  # Nintendo Entertainment System
+    "NG": "NG",  # SNK Neo Geo
+    "NGAGE": "NGAGE",  # Nokia N-GAGE
+    "NGCD": "NGCD",  # SNK Neo Geo CD
+    "NGP": "NGP",  # SNK Neo Geo Pocket
+    "NGPC": "NGPC",  # SNK Neo Geo Pocket Color
+    "ODY2": "ODY2",  # Magnavox Odyssey 2
+    "OUYA": "OUYA",  # Ouya
+    "PALM": "PALM",  # Palm OS
+    "PBL": "PBL",  # Pinball
+    "PC": "PC",  # PC
+    "PC10": "PC10",  # Nintendo PlayChoice-10
+    "PC88": "PC88",  # NEC PC-8801
+    "PC98": "PC98",  # NEC PC-9801
+    "PCB": "PCB",  # PC Boot Loader
+    "PCCD": "PCCD",  # NEC PC Engine CD-ROM
+    "PCE": "PCE",  # NEC PC Engine
+    "PCED": "PCED",  # NEC PC Engine Duo
+    "PICO": "PICO",  # Sega Pico / Kids Computer Pico
+    "PICO8": "PICO8",  # PICO-8 Fantasy Console
+    "PPC": "PPC",  # Microsoft Pocket PC
+    "PS1": "PS1",  # Sony PlayStation 1
+    "PS2": "PS2",  # Sony PlayStation 2
+    "PS3": "PS3",  # Sony PlayStation 3
+    "PS4": "PS4",  # Sony PlayStation 4
+    "PS5": "PS5",  # Sony PlayStation 5
+    "PSP": "PSP",  # Sony PlayStation Portable
+    "QL": "QL",  # Sinclair Quantum Leap
+    "SAM": "SAM",  # Sam Coupe
+    "SAT": "SAT",  # Sega Saturn
+    "SCD": "SCD",  # Sega CD
+    "SFC": "SFC",  # Nintendo Super Famicom
+    "SLOT": "SLOT",  # Slot Machine
+    "SM3": "SM3",  # Sega Mark III
+    "SMD": "SMD",  # Sega Mega Drive
+    "SMS": "SMS",  # Sega Master System
+    "SNES": "SNES",  # Super Nintendo Entertainment System
+    "SW": "SW",  # Nintendo Switch
+    "SYM": "SYM",  # Symbian
+    "TD": "TD",  # NEC TurboDuo
+    "TG16": "TG16",  # NEC TurboGrafx-16
+    "TGCD": "TGCD",  # NEC TurboGrafx CD-ROM
+    "TMO": "TMO",  # Thomson MO
+    "TRS": "TRS",  # Radio Shack TRS-80
+    "TRSC": "TRSC",  # Radio Shack TRS-80 Color Computer
+    "TTO": "TTO",  # Thomson TO
+    "VB": "VB",  # Nintendo Virtual Boy
+    "VECT": "VECT",  # General Consumer Electric Vectrex
+    "VIC": "VIC",  # Commodore VIC 20
+    "VITA": "VITA",  # Sony PlayStation Vita
+    "VR": "VR",  # Virtual Reality
+    "VS": "VS",  # Nintendo VS. System
+    "VVS": "VVS",  # V-Tech V-Smile
+    "VSP": "VSP",  # V-Tech V-Smile Pocket
+    "W16": "W16",  # 16-bit Microsoft Windows: 1, 2, 3, 3.1, 3.11
+    "WCE": "WCE",  # Microsoft Windows CE
+    "WEB": "WEB",  # Web Browser
+    "WII": "WII",  # Nintendo Wii
+    "WIIU": "WIIU",  # Nintendo Wii U
+    "WMOB": "WMOB",  # Windows Mobile: 2003, 2003 SE, 5, 6, 6.1, 6.5
+    "WPH": "WPH",  # Windows Phone
+    "WS": "WS",  # Bandai WonderSwan
+    "WSC": "WSC",  # Bandai WonderSwan Color
+    "X1": "X1",  # Sharp X1
+    "X360": "X360",  # Microsoft Xbox 360
+    "X68": "X68",  # Sharp X68000
+    "XBOX": "XBOX",  # Microsoft Xbox
+    "XEGS": "XEGS",  # Atari XEGS
+    "XONE": "XONE",  # Microsoft Xbox One
+    "XSX": "XSX",  # Microsoft Xbox Series X
+    "ZEBO": "ZEBO",  # Zeebo Zeebo
+    "ZOD": "ZOD",  # Tapwave Zodiac
+    "ZXS": "ZXS",  # Sinclair ZX Spectrum
+}
+
+class _PlatformsMeta(type):
+    def __getattr__(cls, name):
+        try:
+            return _PLATFORMS[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+class KeymastersKeepGamePlatforms(metaclass=_PlatformsMeta):
+    """Mock of the platforms enum; members resolve to their codes through _PLATFORMS."""
+    __slots__ = ()
 
-    return type(class_name, (UniversalOption,), {})
+# Names made available from every mock module, such as dynamically created option classes
+_SHARED_MOCK_NS: Dict[str, Any] = {}
 
+def _shared_mock_getattr(name):
+    try:
+        return _SHARED_MOCK_NS[name]
+    except KeyError:
+        raise AttributeError(name) from None
+
+@functools.cache
 def create_comprehensive_mocks():
-    """Create comprehensive mock environment for any game implementation."""
+    """Create comprehensive mock environment for any game implementation.
+
+    Cached, so the mock classes and sys.modules entries are only built once per process.
+    """
 
     # Mock all possible Options classes
     class Toggle:
@@ -142,148 +328,6 @@ def create_comprehensive_mocks():
         def __init__(self, archipelago_options=None):
             self.archipelago_options = archipelago_options
 
-    # Mock all possible enums - only include the ones actually used by implementations
-    class KeymastersKeepGamePlatforms:
-        _32X = "32X"  # Sega 32X
-        _3DO = "3D0"  # 3DO Multiplayer
-        _3DS = "3DS"  # Nintendo 3DS
-        A2 = "A2"  # Apple II
-        A26 = "A26"  # Atari 2600
-        A2GS = "A2GS"  # Apple IIGS
-        A52 = "A52"  # Atari 5200
-        A78 = "A78"  # Atari 7800
-        A8 = "A8"  # Atari 8-bit: 400, 800, XL, XE
-        ADV = "ADV"  # Entex AdventureVision
-        AMI = "AMI"  # Commodore Amiga
-        AND = "AND"  # Android OS
-        ARC = "ARC"  # Arcade
-        ARCH = "ARCH"  # Acorn Archimedes
-        AST = "AST"  # Atari ST
-        BA = "BA"  # Bally Astrocade
-        BB = "BB"  # BlackBerry
-        BBCM = "BBCM"  # BBC Micro
-        BOARD = "BOARD"  # Board Game (Physical)
-        BREW = "BREW"  # Qualcomm BREW
-        C64 = "C64"  # Commodore 64
-        C128 = "C128"  # Commodore 128
-        CARD = "CARD"  # Card Game (Physical)
-        CD32 = "CD32"  # Amiga CD32
-        CDI = "CDI"  # Philips CD-i
-        CDTV = "CDTV"  # Commodore CDTV
-        CHF = "CHF"  # Fairchild Channel F
-        CP4 = "CP4"  # Commodore 116, 16, Plus/4
-        CPC = "CPC"  # Amstrad CPC 464, CPC664, CPC6128
-        CV = "CV"  # ColecoVision
-        DC = "DC"  # Sega Dreamcast
-        DOS = "DOS"  # MS-DOS
-        ELEC = "ELEC"  # Acorn Electron
-        EXEN = "EXEN"  # In-Fusion ExEn
-        FAL = "FAL"  # Atari Falcon030
-        FC = "FC"  # Nintendo Famicom
-        FDS = "FDS"  # Nintendo Famicom Disk System
-        FIRE = "FIRE"  # Amazon Fire OS
-        FM7 = "FM7"  # Fujitsu FM-7
-        FMT = "FMT"  # Fujitsu FM Towns
-        GB = "GB"  # Nintendo Game Boy
-        GBA = "GBA"  # Nintendo Game Boy Advance
-        GBC = "GBC"  # Nintendo Game Boy Color
-        GC = "GC"  # Nintendo GameCube
-        GCOM = "GCOM"  # Tiger Game.com
-        GEN = "GEN"  # Sega Genesis
-        GG = "GG"  # Sega Game Gear
-        GIZ = "GIZ"  # Tiger Gizmondo
-        GW = "GW"  # Nintendo Game & Watch
-        GX4 = "GX4"  # Amstrad GX4000
-        IMOD = "IMOD"  # NTT DoCoMo i-mode
-        INTV = "INTV"  # Intellivision, Intellivision II
-        IOS = "IOS"  # Apple iOS: iPad, iPod, iPhone
-        J2ME = "J2ME"  # Sun Java 2 Micro Edition
-        JAG = "JAG"  # Atari Jaguar
-        JCD = "JCD"  # Atari Jaguar CD
-        LASR = "LASR"  # Pioneer LaserActive
-        LYNX = "LYNX"  # Atari Lynx
-        MART = "MART"  # Fujitsu FM Towns Marty
-        MCD = "MCD"  # Sega Mega CD
-        META = "META"  # Metagame
-        MOD = "MOD"  # Modded Game
-        MSX = "MSX"  # MSX
-        MSX2 = "MSX2"  # MSX2, MSX2+, MSX TurboR
-        N64 = "N64"  # Nintendo 64
-        NDS = "NDS"  # Nintendo DS
-        NES = "NES"  # Nintendo Entertainment System
-        NG = "NG"  # SNK Neo Geo
-        NGAGE = "NGAGE"  # Nokia N-GAGE
-        NGCD = "NGCD"  # SNK Neo Geo CD
-        NGP = "NGP"  # SNK Neo Geo Pocket
-        NGPC = "NGPC"  # SNK Neo Geo Pocket Color
-        ODY2 = "ODY2"  # Magnavox Odyssey 2
-        OUYA = "OUYA"  # Ouya
-        PALM = "PALM"  # Palm OS
-        PBL = "PBL"  # Pinball
-        PC = "PC"  # PC
-        PC10 = "PC10"  # Nintendo PlayChoice-10
-        PC88 = "PC88"  # NEC PC-8801
-        PC98 = "PC98"  # NEC PC-9801
-        PCB = "PCB"  # PC Boot Loader
-        PCCD = "PCCD"  # NEC PC Engine CD-ROM
-        PCE = "PCE"  # NEC PC Engine
-        PCED = "PCED"  # NEC PC Engine Duo
-        PICO = "PICO"  # Sega Pico / Kids Computer Pico
-        PICO8 = "PICO8"  # PICO-8 Fantasy Console
-        PPC = "PPC"  # Microsoft Pocket PC
-        PS1 = "PS1"  # Sony PlayStation 1
-        PS2 = "PS2"  # Sony PlayStation 2
-        PS3 = "PS3"  # Sony PlayStation 3
-        PS4 = "PS4"  # Sony PlayStation 4
-        PS5 = "PS5"  # Sony PlayStation 5
-        PSP = "PSP"  # Sony PlayStation Portable
-        QL = "QL"  # Sinclair Quantum Leap
-        SAM = "SAM"  # Sam Coupe
-        SAT = "SAT"  # Sega Saturn
-        SCD = "SCD"  # Sega CD
-        SFC = "SFC"  # Nintendo Super Famicom
-        SLOT = "SLOT"  # Slot Machine
-        SM3 = "SM3"  # Sega Mark III
-        SMD = "SMD"  # Sega Mega Drive
-        SMS = "SMS"  # Sega Master System
-        SNES = "SNES"  # Super Nintendo Entertainment System
-        SW = "SW"  # Nintendo Switch
-        SYM = "SYM"  # Symbian
-        TD = "TD"  # NEC TurboDuo
-        TG16 = "TG16"  # NEC TurboGrafx-16
-        TGCD = "TGCD"  # NEC TurboGrafx CD-ROM
-        TMO = "TMO"  # Thomson MO
-        TRS = "TRS"  # Radio Shack TRS-80
-        TRSC = "TRSC"  # Radio Shack TRS-80 Color Computer
-        TTO = "TTO"  # Thomson TO
-        VB = "VB"  # Nintendo Virtual Boy
-        VECT = "VECT"  # General Consumer Electric Vectrex
-        VIC = "VIC"  # Commodore VIC 20
-        VITA = "VITA"  # Sony PlayStation Vita
-        VR = "VR"  # Virtual Reality
-        VS = "VS"  # Nintendo VS. System
-        VVS = "VVS"  # V-Tech V-Smile
-        VSP = "VSP"  # V-Tech V-Smile Pocket
-        W16 = "W16"  # 16-bit Microsoft Windows: 1, 2, 3, 3.1, 3.11
-        WCE = "WCE"  # Microsoft Windows CE
-        WEB = "WEB"  # Web Browser
-        WII = "WII"  # Nintendo Wii
-        WIIU = "WIIU"  # Nintendo Wii U
-        WMOB = "WMOB"  # Windows Mobile: 2003, 2003 SE, 5, 6, 6.1, 6.5
-        WPH = "WPH"  # Windows Phone
-        WS = "WS"  # Bandai WonderSwan
-        WSC = "WSC"  # Bandai WonderSwan Color
-        X1 = "X1"  # Sharp X1
-        X360 = "X360"  # Microsoft Xbox 360
-        X68 = "X68"  # Sharp X68000
-        XBOX = "XBOX"  # Microsoft Xbox
-        XEGS = "XEGS"  # Atari XEGS
-        XONE = "XONE"  # Microsoft Xbox One
-        XSX = "XSX"  # Microsoft Xbox Series X
-        ZEBO = "ZEBO"  # Zeebo Zeebo
-        ZOD = "ZOD"  # Tapwave Zodiac
-        ZXS = "ZXS"  # Sinclair ZX Spectrum
-
     # Create the modules with proper hierarchy for relative imports
 
     # Create the main package modules that relative imports will reference
@@ -302,8 +346,9 @@ def create_comprehensive_mocks():
     for module_name, exports in package_modules.items():
         if module_name not in sys.modules:
             mock_module = types.ModuleType(module_name)
-            for name, obj in exports.items():
-                setattr(mock_module, name, obj)
+            mock_module.__dict__.update(exports)
+            # Anything not exported directly falls through to the shared namespace
+            mock_module.__getattr__ = _shared_mock_getattr
             sys.modules[module_name] = mock_module
 
     # Also create the package roots
@@ -320,52 +365,83 @@ def create_comprehensive_mocks():
     return (Toggle, Choice, Range, GameObjectiveTemplate, Game,
             KeymastersKeepGamePlatforms, OptionSet, DefaultOnToggle, PercentageRange, NamedRange, OptionList, OptionDict)
 
+# Files in the working directory that are never game implementations
+_NON_GAME_FILES = frozenset({
+    'universal_game_demo.py',
+    'universal_game_tester.py',
+    'game_demo.py',
+    'universal_game_tester_fixed.py',
+})
+
+# Game implementation patterns, combined so each file is scanned once.
+# They're all ASCII, so files are matched as bytes without decoding them.
+# The name lookahead checks for a closing quote without consuming the rest of the line.
+_GAME_PATTERNS = re.compile(
+    rb'(?P<game_class>class \w*Game\()'
+    rb'|(?P<name>name\s*=\s*["\'](?=.*["\']))'
+    rb'|(?P<templates>game_objective_templates)'
+    rb'|(?P<platforms>KeymastersKeepGamePlatforms)'
+    rb'|(?P<options>archipelago_options)',
+    re.ASCII
+)
+# The patterns all show up near the top of a game file, so large modules are only partially read
+_SCAN_LIMIT = 64 * 1024
+
+@functools.lru_cache(maxsize=512)
+def _pretty_name(stem: str) -> str:
+    # Rescans keep seeing the same files, so their display names are only built once
+    return stem.replace('_', ' ').title()
+
 def discover_all_game_implementations():
     """Discover ALL game implementation files regardless of naming convention."""
     implementations = []
 
     # Look for any Python file that might contain a game implementation
-    for file in os.listdir('.'):
-        if (file.endswith('.py') and
-            file != 'universal_game_demo.py' and
-            file != 'universal_game_tester.py' and
-            not file.startswith('__') and
-            file != 'game_demo.py' and
-            file != 'universal_game_tester_fixed.py'):
-
-            # Quick scan of the file content to see if it looks like a game implementation
-            try:
-                with open(file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-
-                # Look for game implementation patterns
-                patterns = [
-                    r'class \w*Game\(',
-                    r'name\s*=\s*["\'].*["\']',
-                    r'game_objective_templates',
-                    r'KeymastersKeepGamePlatforms',
-                    r'archipelago_options'
-                ]
-
-                matches = sum(1 for pattern in patterns if re.search(pattern, content))
-
-                if matches >= 2:  # If it matches at least 2 patterns, it's likely a game
-                    implementations.append({
-                        'file': file,
-                        'confidence': matches,
-                        'name': file[:-3].replace('_', ' ').title()
-                    })
+    with os.scandir('.') as entries:
+        candidates = [entry.name for entry in entries
+                      if entry.name.endswith('.py') and
+                      not entry.name.startswith('__') and
+                      entry.name not in _NON_GAME_FILES and
+                      entry.is_file()]
+
+    for file in candidates:
+        # Quick scan of the file content to see if it looks like a game implementation
+        try:
+            with open(file, 'rb') as f:
+                content = f.read(_SCAN_LIMIT)
+
+            # Count how many distinct patterns appear, stopping once all of them have
+            found = set()
+            for match in _GAME_PATTERNS.finditer(content):
+                found.add(match.lastgroup)
+                if len(found) == _GAME_PATTERNS.groups:
+                    break
+            matches = len(found)
+
+            if matches >= 2:  # If it matches at least 2 patterns, it's likely a game
+                implementations.append({
+                    'file': sys.intern(file),
+                    'confidence': matches,
+                    'name': _pretty_name(file[:-3])
+                })
 
-            except Exception as e:
-                continue
+        except Exception as e:
+            continue
 
     # Sort by confidence (most likely games first)
     implementations.sort(key=lambda x: x['confidence'], reverse=True)
     return implementations
 
+# (absolute path, mtime_ns) -> loaded game info, so re-testing an unchanged file skips re-executing it
+_LOAD_CACHE: Dict[Tuple[str, int], Dict] = {}
+
 def load_game_from_file(file_path: str) -> Optional[Dict]:
     """Load a game implementation from any Python file with robust import handling."""
     try:
+        cache_key = (os.path.abspath(file_path), os.stat(file_path).st_mtime_ns)
+        if cache_key in _LOAD_CACHE:
+            return _LOAD_CACHE[cache_key]
+
         module_name = os.path.basename(file_path)[:-3]  # Remove .py
 
         # Set up proper package hierarchy for relative imports (need 2 levels for .. imports)
@@ -404,33 +480,29 @@ def load_game_from_file(file_path: str) -> Optional[Dict]:
         # Execute the module
         spec.loader.exec_module(module)
 
-        # Collect all classes defined in this module
+        # One pass over the module namespace collects its classes, fills in undefined option types and finds game classes
         loaded_classes = {}
-        for name, obj in inspect.getmembers(module):
-            if inspect.isclass(obj):
-                loaded_classes[name] = obj
-
-        # Add universal option classes to the module for any undefined types
-        for name in dir(module):
-            obj = getattr(module, name)
-            if inspect.isclass(obj) and hasattr(obj, '__annotations__'):
-                # This might be an options class, add all possible option types
+        game_classes = []
+        for name, obj in list(module.__dict__.items()):
+            if not isinstance(obj, type):
+                continue
+            loaded_classes[name] = obj
+
+            # Add universal option classes to the module for any undefined types
+            if is_dataclass(obj):
+                # Options classes are dataclasses, add all possible option types
                 for field_name, field_type in getattr(obj, '__annotations__', {}).items():
-                    if hasattr(field_type, '__name__') and field_type.__name__ not in dir(module):
-                        # Create a universal option class for this type
-                        universal_class = create_option_class(field_type.__name__)
+                    if hasattr(field_type, '__name__') and field_type.__name__ not in module.__dict__:
+                        # Create a universal option class for this type, unless another game already needed one.
+                        # Registering it in the shared namespace also makes it importable from every mock module.
+                        universal_class = _SHARED_MOCK_NS.get(field_type.__name__)
+                        if universal_class is None:
+                            universal_class = _SHARED_MOCK_NS[field_type.__name__] = create_option_class(field_type.__name__)
                         setattr(module, field_type.__name__, universal_class)
                         loaded_classes[field_type.__name__] = universal_class
-                        # Also add it to the mock modules so it can be imported
-                        for mock_module_name in ['Options', 'game', 'game_objective_template', 'enums']:
-                            if mock_module_name in sys.modules:
-                                setattr(sys.modules[mock_module_name], field_type.__name__, universal_class)
 
-        # Find game classes
-        game_classes = []
-        for name, obj in inspect.getmembers(module):
-            if (inspect.isclass(obj) and
-                (name.endswith('Game') or hasattr(obj, 'game_objective_templates')) and
+            # Find game classes
+            if ((name.endswith('Game') or hasattr(obj, 'game_objective_templates')) and
                 hasattr(obj, 'name')):
 
                 game_classes.append({
@@ -442,12 +514,60 @@ def load_game_from_file(file_path: str) -> Optional[Dict]:
                     'loaded_classes': loaded_classes  # Include all loaded classes
                 })
 
-        return game_classes[0] if game_classes else None
+        # Pick the alphabetically first class, as a sorted scan of the module would
+        game_classes.sort(key=lambda game_class: game_class['class_name'])
+
+        if not game_classes:
+            return None
+        _LOAD_CACHE[cache_key] = game_classes[0]
+        return game_classes[0]
 
     except Exception as e:
         print(f"Warning: Could not load {file_path}: {e}")
         return None
 
+@functools.lru_cache(maxsize=None)
+def _option_kind(type_name: str) -> Optional[str]:
+    """Classify an option type by name, checking substrings in priority order.
+
+    DefaultOnToggle, PercentageRange and NamedRange contain Toggle or Range, so they are handled as those.
+    """
+    for kind in ('Toggle', 'Choice', 'Range', 'OptionSet', 'OptionList'):
+        if kind in type_name:
+            return kind
+    return None
+
+# Choice class -> value of its alphabetically first option_ attribute, looked up once per class
+_CHOICE_DEFAULTS: Dict[type, Any] = {}
+
+def _choice_option(field_type, Choice):
+    # Find default or first option
+    if hasattr(field_type, 'default'):
+        return Choice(field_type.default)
+    try:
+        return Choice(_CHOICE_DEFAULTS[field_type])
+    except KeyError:
+        pass
+    # Look for option_ attributes, walking the class dicts instead of building a sorted dir()
+    option_names = [attr_name for klass in field_type.__mro__ for attr_name in vars(klass) if attr_name.startswith('option_')]
+    default_value = getattr(field_type, min(option_names)) if option_names else "default"
+    _CHOICE_DEFAULTS[field_type] = default_value
+    return Choice(default_value)
+
+def _range_option(field_type, Range):
+    # For Range types, use the class's specific range parameters if available
+    try:
+        start = getattr(field_type, 'range_start', 1)
+        end = getattr(field_type, 'range_end', 10)
+        option = Range(start, end, 1)
+        # Set the value to the class's default if available
+        if hasattr(field_type, 'default'):
+            option.value = field_type.default
+        return option
+    except Exception as e:
+        print(f"Warning: Could not create {field_type.__name__} with specific range: {e}")
+        return Range(1, 10, 1)
+
 def create_smart_options(game_class, Toggle, Choice, Range, OptionSet=None, DefaultOnToggle=None, PercentageRange=None, NamedRange=None, OptionList=None, OptionDict=None, loaded_classes=None):
     """Intelligently create default options for any game class."""
     try:
@@ -464,6 +584,17 @@ def create_smart_options(game_class, Toggle, Choice, Range, OptionSet=None, Defa
 
         options_dict = {}
 
+        # Mock option factories by kind, for option types that map straight onto a mock class
+        factories = {
+            'Toggle': lambda field_type: Toggle(True),
+            'Choice': lambda field_type: _choice_option(field_type, Choice),
+            'Range': lambda field_type: _range_option(field_type, Range),
+        }
+        if OptionSet:
+            factories['OptionSet'] = lambda field_type: OptionSet(set())
+        if OptionList:
+            factories['OptionList'] = lambda field_type: OptionList([])
+
         for field_name, field in options_cls.__dataclass_fields__.items():
             field_type = field.type
 
@@ -476,44 +607,9 @@ def create_smart_options(game_class, Toggle, Choice, Range, OptionSet=None, Defa
             if hasattr(field_type, '__name__'):
                 type_name = field_type.__name__
 
-                if 'Toggle' in type_name:
-                    options_dict[field_name] = Toggle(True)
-                elif 'Choice' in type_name:
-                    # Find default or first option
-                    if hasattr(field_type, 'default'):
-                        options_dict[field_name] = Choice(field_type.default)
-                    else:
-                        # Look for option_ attributes
-                        for attr_name in dir(field_type):
-                            if attr_name.startswith('option_'):
-                                default_value = getattr(field_type, attr_name)
-                                options_dict[field_name] = Choice(default_value)
-                                break
-                        else:
-                            options_dict[field_name] = Choice("default")
-                elif 'Range' in type_name:
-                    # For Range types, use the class's specific range parameters if available
-                    try:
-                        start = getattr(field_type, 'range_start', 1)
-                        end = getattr(field_type, 'range_end', 10)
-                        default = getattr(field_type, 'default', start)
-                        options_dict[field_name] = Range(start, end, 1)
-                        # Set the value to the class's default if available
-                        if hasattr(field_type, 'default'):
-                            options_dict[field_name].value = field_type.default
-                    except Exception as e:
-                        print(f"Warning: Could not create {type_name} with specific range: {e}")
-                        options_dict[field_name] = Range(1, 10, 1)
-                elif 'OptionSet' in type_name and OptionSet:
-                    options_dict[field_name] = OptionSet(set())
-                elif 'DefaultOnToggle' in type_name and DefaultOnToggle:
-                    options_dict[field_name] = DefaultOnToggle(True)
-                elif 'PercentageRange' in type_name and PercentageRange:
-                    options_dict[field_name] = PercentageRange(50)
-                elif 'NamedRange' in type_name and NamedRange:
-                    options_dict[field_name] = NamedRange(1)
-                elif 'OptionList' in type_name and OptionList:
-                    options_dict[field_name] = OptionList([])
+                factory = factories.get(_option_kind(type_name))
+                if factory is not None:
+                    options_dict[field_name] = factory(field_type)
                 elif hasattr(field_type, 'default'):
                     # This is likely a custom option class with a default
                     try:
@@ -582,16 +678,32 @@ def create_smart_options(game_class, Toggle, Choice, Range, OptionSet=None, Defa
         print(f"Warning: Could not create options: {e}")
         return None
 
+# Attribute name keywords that indicate a game feature, in priority order
+_FEATURE_KEYWORDS = (
+    ('relationship', 'Relationship System'),
+    ('preferred', 'Dynamic Preferences'),
+    ('difficulty', 'Difficulty Scaling'),
+    ('cursed', 'Cursed/Challenge Mode'),
+)
+
+@functools.lru_cache(maxsize=None)
+def _category_label(attr_name: str) -> str:
+    category = attr_name.replace('_', ' ').title()
+    if len(category) > 10:  # Don't include very long names
+        category = category[:10] + "..."
+    return category
+
 def analyze_implementation(game_instance) -> Dict:
     """Comprehensive analysis of any game implementation."""
     analysis = {
         'total_objectives': 0,
         'weight_distribution': {},
-        'features': [],
+        'features': set(),
         'categories': [],
         'special_methods': [],
         'data_sources': set(),
-        'complexity_score': 0
+        'complexity_score': 0,
+        'average_weight': 0.0
     }
 
     try:
@@ -606,10 +718,10 @@ def analyze_implementation(game_instance) -> Dict:
         analysis['total_objectives'] = len(templates)
 
         # Weight distribution and data analysis
+        weights = []
         for template in templates:
             try:
-                weight = getattr(template, 'weight', 1)
-                analysis['weight_distribution'][weight] = analysis['weight_distribution'].get(weight, 0) + 1
+                weights.append(getattr(template, 'weight', 1))
 
                 # Analyze data sources safely
                 if hasattr(template, 'data') and isinstance(template.data, dict):
@@ -625,40 +737,40 @@ def analyze_implementation(game_instance) -> Dict:
                             continue
             except Exception as e:
                 continue
+        # Counted in one go rather than with a dict update per template
+        analysis['weight_distribution'] = dict(Counter(weights))
 
         # Look for special features and methods
         for attr_name in dir(game_instance):
             if not attr_name.startswith('_'):
-                try:
-                    attr = getattr(game_instance, attr_name)
-
-                    if 'relationship' in attr_name.lower():
-                        analysis['features'].append('Relationship System')
-                    elif 'preferred' in attr_name.lower():
-                        analysis['features'].append('Dynamic Preferences')
-                    elif 'difficulty' in attr_name.lower():
-                        analysis['features'].append('Difficulty Scaling')
-                    elif 'cursed' in attr_name.lower():
-                        analysis['features'].append('Cursed/Challenge Mode')
-                    elif callable(attr) and attr_name.endswith('_templates'):
-                        analysis['special_methods'].append(attr_name)
-                except Exception as e:
-                    continue
+                # Features are detected from the name alone; only *_templates attributes need fetching
+                lowered = attr_name.lower()
+                feature = next((feature for keyword, feature in _FEATURE_KEYWORDS if keyword in lowered), None)
+                if feature is not None:
+                    analysis['features'].add(feature)
+                elif attr_name.endswith('_templates'):
+                    try:
+                        if callable(getattr(game_instance, attr_name)):
+                            analysis['special_methods'].append(attr_name)
+                    except Exception as e:
+                        continue
 
         # Analyze option categories
         if hasattr(game_instance, 'archipelago_options'):
             try:
                 options = game_instance.archipelago_options
                 if options:
-                    for attr_name in dir(options):
+                    # Options classes are dataclasses, so their fields are the options
+                    if is_dataclass(options):
+                        attr_names = [field.name for field in fields(options)]
+                    else:
+                        attr_names = list(vars(options))
+                    for attr_name in attr_names:
                         if not attr_name.startswith('_'):
                             try:
                                 attr_value = getattr(options, attr_name, None)
                                 if hasattr(attr_value, 'value'):
-                                    category = attr_name.replace('_', ' ').title()
-                                    if len(category) > 10:  # Don't include very long names
-                                        category = category[:10] + "..."
-                                    analysis['categories'].append(category)
+                                    analysis['categories'].append(_category_label(attr_name))
                             except Exception as e:
                                 continue
             except Exception as e:
@@ -672,129 +784,325 @@ def analyze_implementation(game_instance) -> Dict:
             len(analysis['categories'])
         )
 
-        # Remove duplicates from features
-        analysis['features'] = list(set(analysis['features']))
+        # Summed straight from the weights gathered above rather than re-deriving it from the distribution
+        if templates:
+            analysis['average_weight'] = sum(weights) / len(templates)
 
     except Exception as e:
         print(f"Error analyzing implementation: {e}")
-        import traceback
         traceback.print_exc()
 
+    # Reporting slices the features, so hand them back as a list
+    analysis['features'] = list(analysis['features'])
     return analysis
 
-def generate_dynamic_objectives(game_instance, count=6) -> List[Dict]:
-    """Generate objectives using dynamic weighted selection like the actual Keep."""
+@functools.lru_cache(maxsize=None)
+def build_alias_table(weights: Tuple[int, ...]) -> Tuple[List[float], List[int]]:
+    """Build a Vose alias table for drawing indices in proportion to their weights.
+
+    Draw with: pick i uniformly, keep it if random() < prob[i], otherwise use alias[i].
+    """
+    n = len(weights)
+    total = sum(weights)
+    prob = [weight * n / total for weight in weights]
+    alias = list(range(n))
+    small = deque(i for i, p in enumerate(prob) if p < 1)
+    large = deque(i for i, p in enumerate(prob) if p >= 1)
+    while small and large:
+        less = small.popleft()
+        more = large.popleft()
+        alias[less] = more
+        prob[more] -= 1 - prob[less]
+        (small if prob[more] < 1 else large).append(more)
+    # Anything left over is only short of 1 through rounding error
+    for i in small + large:
+        prob[i] = 1.0
+    return prob, alias
+
+# How a placeholder's value is produced: a fixed string, or a pick from a tuple of its data source's values as strings
+_PLAN_VALUE = 0
+_PLAN_CHOICES = 1
+
+@dataclass(slots=True)
+class ObjectiveMeta:
+    """Details of a generated objective that come straight from its template."""
+    weight: Any
+    is_time_consuming: bool
+    is_difficult: bool
+    original_label: str
+    data_complexity: int
+
+@dataclass(slots=True)
+class Objective:
+    """An objective generated from a template, with its placeholders filled in."""
+    label: str
+    meta: ObjectiveMeta
+
+class _TemplatePlan(NamedTuple):
+    label: str
+    pattern: Optional[re.Pattern]  # Matches any of the placeholders, None if there are none
+    entries: List[Tuple[str, Any, int]]  # (placeholder, value or values, kind)
+    meta: ObjectiveMeta
+
+# id(template) -> (template, plan) for the game being tested; the template is kept so its id can't be reused
+_template_plan_cache: Dict[int, Tuple[Any, _TemplatePlan]] = {}
+
+def _as_strings(values) -> Tuple[str, ...]:
+    # Most data is already strings, which can skip the str() call
+    return tuple(value if type(value) is str else str(value) for value in values)
+
+def _placeholder_pattern(placeholders: List[str]) -> Optional[re.Pattern]:
+    if not placeholders:
+        return None
+    # Longest first, so a placeholder that is a prefix of another can't match inside it
+    return re.compile('|'.join(map(re.escape, sorted(placeholders, key=len, reverse=True))))
+
+def _template_plan(template) -> _TemplatePlan:
+    """Resolve a template's placeholders and details once, so repeat draws skip the attribute probing."""
+    cached = _template_plan_cache.get(id(template))
+    if cached is not None and cached[0] is template:
+        return cached[1]
+
+    plan = []
+    template_data = getattr(template, 'data', {})
+    if isinstance(template_data, dict):
+        for placeholder, data_info in template_data.items():
+            # Handle different data formats
+            if isinstance(data_info, (list, tuple)) and len(data_info) >= 1:
+                data_source = data_info[0]
+            else:
+                data_source = data_info
+
+            if not callable(data_source):
+                plan.append((placeholder, str(data_source), _PLAN_VALUE))
+                continue
+            # Data sources are called once and their values kept as strings, rather than rebuilt for every draw
+            values = data_source()
+            if hasattr(values, '__iter__') and not isinstance(values, str):
+                if hasattr(values, '__getitem__') and len(values) > 0:
+                    plan.append((placeholder, _as_strings(values), _PLAN_CHOICES))
+                elif hasattr(values, '__next__'):
+                    value_tuple = _as_strings(values)
+                    if value_tuple:
+                        plan.append((placeholder, value_tuple, _PLAN_CHOICES))
+                    else:
+                        plan.append((placeholder, "VALUE", _PLAN_VALUE))
+                else:
+                    plan.append((placeholder, str(values), _PLAN_VALUE))
+            else:
+                plan.append((placeholder, str(values), _PLAN_VALUE))
+
+    pattern = _placeholder_pattern([entry[0] for entry in plan])
+    meta = ObjectiveMeta(
+        weight=getattr(template, 'weight', 1),
+        is_time_consuming=getattr(template, 'is_time_consuming', False),
+        is_difficult=getattr(template, 'is_difficult', False),
+        original_label=getattr(template, 'label', ''),
+        data_complexity=len(template_data),
+    )
+    result = _TemplatePlan(getattr(template, 'label', 'Unknown Objective'), pattern, plan, meta)
+    _template_plan_cache[id(template)] = (template, result)
+    return result
+
+# Template plans persisted between runs: (absolute path, mtime_ns) of the game file -> {template index: plan}
+# The file name is versioned whenever the stored plan format changes.
+_PLAN_STORE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'kmk_tools', 'plans-2.pkl')
+_plan_store: Optional[Dict[Tuple[str, int], Dict[int, tuple]]] = None
+# Collects plans instead of saving them while _run_one is testing, so parallel workers don't overwrite each other's saves
+_deferred_plans: Optional[Dict[Tuple[str, int], Dict[int, tuple]]] = None
+
+def _load_plan_store() -> Dict[Tuple[str, int], Dict[int, tuple]]:
+    global _plan_store
+    if _plan_store is None:
+        try:
+            with open(_PLAN_STORE_PATH, 'rb') as f:
+                _plan_store = pickle.load(f)
+        except Exception:
+            _plan_store = {}
+    return _plan_store
+
+def _game_file_key(game_instance) -> Optional[Tuple[str, int]]:
+    module = sys.modules.get(type(game_instance).__module__)
+    file_path = getattr(module, '__file__', None)
+    if not file_path:
+        return None
     try:
-        templates = game_instance.game_objective_templates()
+        return (os.path.abspath(file_path), os.stat(file_path).st_mtime_ns)
+    except OSError:
+        return None
+
+def _restore_plans(file_key: Tuple[str, int], templates) -> None:
+    """Seed the plan cache with plans persisted for an unchanged game file."""
+    stored = _load_plan_store().get(file_key)
+    if not stored:
+        return
+    for index, template in enumerate(templates):
+        entry = stored.get(index)
+        cached = _template_plan_cache.get(id(template))
+        if entry is None or (cached is not None and cached[0] is template):
+            continue
+        label, entries, meta_fields = entry
+        if label != getattr(template, 'label', 'Unknown Objective'):
+            continue
+        plan = _TemplatePlan(label, _placeholder_pattern([placeholder for placeholder, _, _ in entries]), entries, ObjectiveMeta(*meta_fields))
+        _template_plan_cache[id(template)] = (template, plan)
+
+def _persist_plans(file_key: Tuple[str, int], templates) -> None:
+    """Save the game file's template plans if any were built since they were last stored."""
+    store = _load_plan_store()
+    existing = store.get(file_key, {})
+    stored = {}
+    for index, template in enumerate(templates):
+        cached = _template_plan_cache.get(id(template))
+        if cached is not None and cached[0] is template:
+            plan = cached[1]
+            # Plain tuples, so loading doesn't depend on this module's name
+            stored[index] = (plan.label, plan.entries, astuple(plan.meta))
+    if stored.keys() <= existing.keys():
+        return
+    if _deferred_plans is not None:
+        _deferred_plans[file_key] = stored
+        return
+    _save_plans({file_key: stored})
+
+def _save_plans(plans: Dict[Tuple[str, int], Dict[int, tuple]]) -> None:
+    """Merge game files' plans into the plan store and write it out."""
+    store = _load_plan_store()
+    for file_key, stored in plans.items():
+        # Plans from older versions of the file can't be used again
+        for key in [key for key in store if key[0] == file_key[0]]:
+            del store[key]
+        store[file_key] = stored
+    # Per process, as separate tester runs can save at the same time
+    temp_path = f"{_PLAN_STORE_PATH}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(_PLAN_STORE_PATH), exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            pickle.dump(store, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, _PLAN_STORE_PATH)
+    except Exception as e:
+        print(f"Warning: Could not save template plans: {e}")
+        # Some data source values can't be pickled; keep those plans out of the store so later saves still work
+        for file_key in plans:
+            store.pop(file_key, None)
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+# Below this many templates, draws with replacement use random.choices instead of an alias table
+_ALIAS_MIN_TEMPLATES = 32
+
+def _weighted_indices(weights: List[int], count: int) -> Iterator[int]:
+    """Yield indices by weight, up to count distinct ones first and then with repeats.
+
+    The distinct picks use Efraimidis-Spirakis keys, i.e. weighted sampling without replacement.
+    """
+    keys = ((-math.log(1.0 - random.random()) / weight, index) for index, weight in enumerate(weights) if weight > 0)
+    for _, index in heapq.nsmallest(count, keys):
+        yield index
+
+    # Out of distinct templates (or some failed to populate), so keep drawing with replacement
+    if len(weights) < _ALIAS_MIN_TEMPLATES:
+        # For a handful of templates, batches from the C-level random.choices beat setting up an alias table
+        indices = range(len(weights))
+        cum_weights = list(accumulate(weights))
+        while True:
+            yield from random.choices(indices, cum_weights=cum_weights, k=count)
+    prob, alias = build_alias_table(tuple(weights))
+    while True:
+        index = random.randrange(len(prob))
+        yield index if random.random() < prob[index] else alias[index]
+
+def generate_dynamic_objectives(game_instance, count=6, templates=None) -> Iterator[Objective]:
+    """Generate objectives using dynamic weighted selection like the actual Keep.
+
+    Objectives are yielded as they're populated, up to count of them.
+    Pass templates to reuse an already fetched game_objective_templates() list across calls;
+    plans built along the way are left for the caller to save with _persist_plans.
+    """
+    try:
+        if templates is None:
+            templates = game_instance.game_objective_templates()
 
         # Handle case where templates might not be a list
         if not isinstance(templates, (list, tuple)):
             print(f"Warning: game_objective_templates() returned {type(templates)}, expected list")
-            return []
+            return
 
         if not templates:
-            return []
+            return
 
-        # Create weighted selection pool (simulating Keep's selection process)
-        weighted_pool = []
+        # Template weights for selection (simulating Keep's selection process)
+        weights = []
         for template in templates:
             try:
-                weight = getattr(template, 'weight', 1)
-                # Add each template to the pool multiple times based on its weight
-                # This simulates the Keep's weighted random selection
-                for _ in range(weight):
-                    weighted_pool.append(template)
-            except:
-                continue
+                weights.append(max(int(getattr(template, 'weight', 1)), 0))
+            except Exception:
+                weights.append(0)
 
-        if not weighted_pool:
-            return []
+        if not any(weights):
+            return
 
-        selected_objectives = []
-        used_templates = set()  # Prevent immediate duplicates
+        # Reuse plans built for this file in earlier runs, as long as it hasn't changed since
+        file_key = _game_file_key(game_instance)
+        if file_key is not None:
+            _restore_plans(file_key, templates)
 
-        attempts = 0
+        if count <= 0:
+            return
+        generated = 0
         max_attempts = count * 10  # Prevent infinite loops
 
-        while len(selected_objectives) < count and attempts < max_attempts:
-            attempts += 1
-
-            # Randomly select from weighted pool (like Keep's selection)
-            selected_template = random.choice(weighted_pool)
-
-            # Skip if we just used this template (add some variety)
-            template_id = id(selected_template)
-            if template_id in used_templates and len(used_templates) < len(templates):
-                continue
-
-            # Populate the template with actual data
-            populated_label = getattr(selected_template, 'label', 'Unknown Objective')
-            populated_successfully = True
+        # Randomly select by weight (like Keep's selection)
+        for index in islice(_weighted_indices(weights, count), max_attempts):
+            selected_template = templates[index]
 
             # Dynamic template population (like actual objective generation)
-            template_data = getattr(selected_template, 'data', {})
-            if isinstance(template_data, dict):
-                for placeholder, data_info in template_data.items():
-                    try:
-                        # Handle different data formats
-                        if isinstance(data_info, (list, tuple)) and len(data_info) >= 1:
-                            data_source = data_info[0]
-                        else:
-                            data_source = data_info
-
-                        if callable(data_source):
-                            values = data_source()
-                            if hasattr(values, '__iter__') and not isinstance(values, str):
-                                # Randomly select from available values (like Keep does)
-                                if hasattr(values, '__getitem__') and len(values) > 0:
-                                    value = random.choice(list(values))
-                                elif hasattr(values, '__next__'):
-                                    value_list = list(values)
-                                    value = random.choice(value_list) if value_list else "VALUE"
-                                else:
-                                    value = str(values)
-                            else:
-                                value = str(values)
+            try:
+                plan = _template_plan(selected_template)
+                # Populate the template with actual data
+                populated_label = plan.label
+                if plan.pattern is not None:
+                    values = {}
+                    for placeholder, source, kind in plan.entries:
+                        if kind == _PLAN_CHOICES:
+                            # Randomly select from available values (like Keep does)
+                            values[placeholder] = source[random.randrange(len(source))]
                         else:
-                            value = str(data_source)
-
-                        populated_label = populated_label.replace(placeholder, str(value))
-                    except Exception as e:
-                        # If we can't populate, mark as failed and try another
-                        populated_successfully = False
-                        break
-
-            if populated_successfully:
-                selected_objectives.append({
-                    'label': populated_label,
-                    'weight': getattr(selected_template, 'weight', 1),
-                    'time_consuming': getattr(selected_template, 'is_time_consuming', False),
-                    'difficult': getattr(selected_template, 'is_difficult', False),
-                    'original_label': getattr(selected_template, 'label', ''),
-                    'data_complexity': len(template_data),
-                    'selection_weight': getattr(selected_template, 'weight', 1)  # Show actual selection weight
-                })
-
-                used_templates.add(template_id)
+                            values[placeholder] = source
 
-                # Clear used templates occasionally to allow repeats (like Keep does)
-                if len(used_templates) >= min(len(templates), count // 2):
-                    used_templates.clear()
+                    # Substitute every placeholder in one pass over the label
+                    populated_label = plan.pattern.sub(lambda match: values[match.group(0)], populated_label)
+            except Exception as e:
+                # If we can't populate, skip it and try another
+                continue
 
-        return selected_objectives
+            yield Objective(populated_label, plan.meta)
+            generated += 1
+            if generated >= count:
+                break
 
     except Exception as e:
         print(f"Error generating dynamic objectives: {e}")
-        return []
 
-def test_implementation(impl_info: Dict, Toggle, Choice, Range, OptionSet=None, DefaultOnToggle=None, PercentageRange=None, NamedRange=None, OptionList=None, OptionDict=None):
-    """Test any game implementation comprehensively."""
+# Weight distribution bars, up to the 20 character cap
+_BARS = tuple("=" * length for length in range(21))
+
+def test_implementation(impl_info: Dict, Toggle, Choice, Range, OptionSet=None, DefaultOnToggle=None, PercentageRange=None, NamedRange=None, OptionList=None, OptionDict=None, detailed: Optional[bool] = None):
+    """Test any game implementation comprehensively.
+
+    detailed shows the objective listing and demo rounds; it defaults to whether stdout is a terminal.
+    """
+    if detailed is None:
+        detailed = sys.stdout.isatty()
     print(f"\n{'='*60}")
     print(f"TESTING: {impl_info['game_name']}")
     print(f"File: {impl_info['file_path']}")
     print(f"Class: {impl_info['class_name']}")
     print(f"{'='*60}")
 
+    # Plans only need to outlive one test; the plan store covers reuse across tests and runs
+    _template_plan_cache.clear()
+
     try:
         # Create options
         loaded_classes = impl_info.get('loaded_classes', {})
@@ -816,7 +1124,7 @@ def test_implementation(impl_info: Dict, Toggle, Choice, Range, OptionSet=None,
             print(f"   - Weight Distribution:")
             for weight in sorted(analysis['weight_distribution'].keys(), reverse=True):
                 count = analysis['weight_distribution'][weight]
-                bar = "=" * min(count, 20)  # Visual bar
+                bar = _BARS[min(count, 20)]  # Visual bar
                 print(f"     - Weight {weight}: {count} objectives {bar}")
 
         if analysis['features']:
@@ -830,38 +1138,57 @@ def test_implementation(impl_info: Dict, Toggle, Choice, Range, OptionSet=None,
         if analysis['data_sources']:
             print(f"   - Data Sources: {len(analysis['data_sources'])} unique types")
 
+        # Fetch the templates once for every round of generation below
+        try:
+            templates = game_instance.game_objective_templates()
+        except Exception:
+            templates = None  # Let generate_dynamic_objectives report the error
+
         # Generate and display dynamic objectives (simulating Keep's selection)
-        samples = generate_dynamic_objectives(game_instance, 6)
+        samples = list(generate_dynamic_objectives(game_instance, 6, templates))
 
-        if samples:
+        if samples and not detailed:
+            # Output is piped, logged or captured for a batch run, so skip the detailed listing and demo rounds
+            print(f"\nDYNAMIC OBJECTIVE SELECTION: {len(samples)} objectives generated")
+        elif samples:
             print(f"\nDYNAMIC OBJECTIVE SELECTION (simulating Keep's weighted selection):")
             for i, obj in enumerate(samples, 1):
                 # Smart indicators
-                weight_indicator = "[HIGH]" if obj['weight'] >= 10 else "[MED]" if obj['weight'] >= 8 else "[LOW]" if obj['weight'] >= 5 else "[MIN]"
-                difficulty = "[HARD]" if obj['difficult'] else "[EASY]"
-                time = "[LONG]" if obj['time_consuming'] else "[QUICK]"
-                complexity = f"[DATA x{obj['data_complexity']}]" if obj['data_complexity'] > 0 else ""
-                selection_info = f"[WEIGHT {obj['selection_weight']}]" if 'selection_weight' in obj else ""
+                meta = obj.meta
+                weight_indicator = "[HIGH]" if meta.weight >= 10 else "[MED]" if meta.weight >= 8 else "[LOW]" if meta.weight >= 5 else "[MIN]"
+                difficulty = "[HARD]" if meta.is_difficult else "[EASY]"
+                time = "[LONG]" if meta.is_time_consuming else "[QUICK]"
+                complexity = f"[DATA x{meta.data_complexity}]" if meta.data_complexity > 0 else ""
+                selection_info = f"[WEIGHT {meta.weight}]"  # Show actual selection weight
 
-                print(f"   {i}. {weight_indicator} {obj['label']}")
-                print(f"      -> Weight: {obj['weight']} | {difficulty} | {time} {complexity} {selection_info}")
+                print(f"   {i}. {weight_indicator} {obj.label}")
+                print(f"      -> Weight: {meta.weight} | {difficulty} | {time} {complexity} {selection_info}")
 
             # Show multiple rounds to demonstrate dynamic selection
             print(f"\nDEMONSTRATING DYNAMIC SELECTION (3 more rounds):")
             for round_num in range(1, 4):
-                round_samples = generate_dynamic_objectives(game_instance, 3)
-                if round_samples:
+                round_labels = [f"W{obj.meta.weight}:{obj.label[:30]}..." if len(obj.label) > 30 else f"W{obj.meta.weight}:{obj.label}"
+                                for obj in generate_dynamic_objectives(game_instance, 3, templates)]
+                if round_labels:
                     print(f"   Round {round_num}: ", end="")
-                    round_labels = [f"W{obj['weight']}:{obj['label'][:30]}..." if len(obj['label']) > 30 else f"W{obj['weight']}:{obj['label']}" for obj in round_samples]
                     print(" | ".join(round_labels))
 
         else:
             print(f"\nWARNING: No objectives could be generated dynamically")
 
+        # Save the plans built by all the rounds above in one write
+        file_key = _game_file_key(game_instance)
+        if file_key is not None and isinstance(templates, (list, tuple)):
+            _persist_plans(file_key, templates)
+
         # Test constraints if available
-        if hasattr(game_instance, 'optional_game_constraint_templates'):
+        constraint_templates = getattr(game_instance, 'optional_game_constraint_templates', None)
+        if constraint_templates is not None:
             try:
-                constraints = game_instance.optional_game_constraint_templates()
+                # Loaded game info is reused while its file is unchanged, so menu re-tests can reuse the constraints too
+                if 'constraints' not in impl_info:
+                    impl_info['constraints'] = constraint_templates()
+                constraints = impl_info['constraints']
                 if constraints:
                     print(f"\nCONSTRAINT SYSTEM: {len(constraints)} templates")
                     for constraint in constraints[:3]:
@@ -873,9 +1200,8 @@ def test_implementation(impl_info: Dict, Toggle, Choice, Range, OptionSet=None,
 
         # Calculate and display metrics
         if analysis['total_objectives'] > 0:
-            avg_weight = sum(w * c for w, c in analysis['weight_distribution'].items()) / analysis['total_objectives']
             print(f"\nMETRICS:")
-            print(f"   - Average Weight: {avg_weight:.1f}")
+            print(f"   - Average Weight: {analysis['average_weight']:.1f}")
             print(f"   - Feature Richness: {len(analysis['features'])}/10")
             print(f"   - Customization: {len(analysis['categories'])} options")
 
@@ -883,9 +1209,31 @@ def test_implementation(impl_info: Dict, Toggle, Choice, Range, OptionSet=None,
 
     except Exception as e:
         print(f"\n[ERROR] Error testing implementation: {e}")
-        import traceback
         traceback.print_exc()
 
+def _run_one(file_path: str, detailed: bool) -> Tuple[str, Dict[Tuple[str, int], Dict[int, tuple]]]:
+    """Load and test one game file, returning everything it printed and the template plans it built.
+
+    Runs in worker processes, so the mocks are set up here rather than passed in,
+    and the plans are left for the parent to save. Output is captured, so whether
+    to show the detailed listing is decided by the caller's terminal.
+    """
+    global _deferred_plans
+    _deferred_plans = {}
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output), redirect_stderr(output):
+            (Toggle, Choice, Range, GameObjectiveTemplate, Game,
+             KeymastersKeepGamePlatforms, OptionSet, DefaultOnToggle, PercentageRange, NamedRange, OptionList, OptionDict) = create_comprehensive_mocks()
+            game_info = load_game_from_file(file_path)
+            if game_info:
+                test_implementation(game_info, Toggle, Choice, Range, OptionSet, DefaultOnToggle, PercentageRange, NamedRange, OptionList, OptionDict, detailed)
+            else:
+                print(f"[ERROR] Could not load {file_path}")
+    finally:
+        plans, _deferred_plans = _deferred_plans, None
+    return output.getvalue(), plans
+
 def main():
     """Universal game implementation testing system."""
     print("KEYMASTERS KEEP - UNIVERSAL IMPLEMENTATION TESTER")
@@ -948,12 +1296,23 @@ def main():
                 break
             elif choice == str(len(implementations) + 1):
                 print("\nTesting all implementations...")
-                for impl in implementations:
-                    game_info = load_game_from_file(impl['file'])
-                    if game_info:
-                        test_implementation(game_info, Toggle, Choice, Range, OptionSet, DefaultOnToggle, PercentageRange, NamedRange, OptionList, OptionDict)
-                    else:
-                        print(f"[ERROR] Could not load {impl['file']}")
+                files = [impl['file'] for impl in implementations]
+                detailed = sys.stdout.isatty()
+                plans = {}
+                if len(files) > 1:
+                    # Each game is tested independently, so spread them across processes and print their reports in order
+                    with ProcessPoolExecutor(max_workers=min(len(files), os.cpu_count() or 1)) as executor:
+                        for report, built in executor.map(_run_one, files, [detailed] * len(files)):
+                            print(report, end="")
+                            plans.update(built)
+                elif files:
+                    report, plans = _run_one(files[0], detailed)
+                    print(report, end="")
+                else:
+                    print("[ERROR] No implementations to test, try rescanning")
+                # Saved once here, as separate saves from each worker would replace one another
+                if plans:
+                    _save_plans(plans)
             elif choice == str(len(implementations) + 2):
                 print("Rescanning...")
                 implementations = discover_all_game_implementations()